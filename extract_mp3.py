@@ -3,11 +3,63 @@ load_dotenv()
 import sys
 import os
 import argparse
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
+import subprocess
+import tempfile
+import json
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 
+def has_audio_stream(input_path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a",
+         "-show_entries", "stream=codec_type", "-of", "csv=p=0", input_path],
+        capture_output=True, text=True, check=True
+    )
+    return bool(result.stdout.strip())
+
+
+def probe_stream_params(input_path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error",
+         "-show_entries", "stream=codec_type,codec_name,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels",
+         "-of", "json", input_path],
+        capture_output=True, text=True, check=True
+    )
+    streams = json.loads(result.stdout).get("streams", [])
+    return [tuple(sorted(stream.items())) for stream in streams]
+
+
+def probe_video_format(input_path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height,r_frame_rate", "-of", "json", input_path],
+        capture_output=True, text=True, check=True
+    )
+    stream = json.loads(result.stdout)["streams"][0]
+    return stream["width"], stream["height"], stream["r_frame_rate"]
+
+
+def concat_filter_args(video_paths):
+    width, height, frame_rate = probe_video_format(video_paths[0])
+    with_audio = all(has_audio_stream(path) for path in video_paths)
+    inputs, filters, labels = [], [], []
+    for i, path in enumerate(video_paths):
+        inputs += ["-i", path]
+        filters.append(
+            f"[{i}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={frame_rate},format=yuv420p[v{i}]"
+        )
+        labels.append(f"[v{i}]")
+        if with_audio:
+            filters.append(f"[{i}:a:0]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo[a{i}]")
+            labels.append(f"[a{i}]")
+    outputs = "[v][a]" if with_audio else "[v]"
+    filters.append(f"{''.join(labels)}concat=n={len(video_paths)}:v=1:a={int(with_audio)}{outputs}")
+    maps = ["-map", "[v]", "-map", "[a]"] if with_audio else ["-map", "[v]"]
+    return [*inputs, "-filter_complex", ";".join(filters), *maps], with_audio
+
+
 def extract_mp3(input_path):
     if not os.path.isfile(input_path):
         print(f"File not found: {input_path}")
@@ -15,12 +67,14 @@ def extract_mp3(input_path):
     filename, _ = os.path.splitext(os.path.basename(input_path))
     output_path = f"{filename}.mp3"
     try:
-        with VideoFileClip(input_path) as video:
-            audio = video.audio
-            if audio is None:
-                print("No audio stream found in the video.")
-                return
-            audio.write_audiofile(output_path, codec='mp3')
+        if not has_audio_stream(input_path):
+            print("No audio stream found in the video.")
+            return
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", input_path, "-vn", "-ac", "2", "-ar", "44100",
+             "-codec:a", "libmp3lame", "-q:a", "2", output_path],
+            check=True
+        )
         print(f"Extracted MP3 saved as: {output_path}")
     except Exception as e:
         print(f"Error: {e}")
@@ -36,10 +90,12 @@ def replace_audio(input_video_path, enhanced_wav_path):
     filename, ext = os.path.splitext(os.path.basename(input_video_path))
     output_path = f"{filename}_enhanced{ext}"
     try:
-        with VideoFileClip(input_video_path) as video:
-            with AudioFileClip(enhanced_wav_path) as audio:
-                video = video.set_audio(audio)
-                video.write_videofile(output_path, codec='libx264', audio_codec='aac', audio_fps=44100, temp_audiofile='temp-audio.m4a', remove_temp=True)
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", input_video_path, "-i", enhanced_wav_path,
+             "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy",
+             "-c:a", "aac", "-b:a", "192k", "-shortest", output_path],
+            check=True
+        )
         print(f"Video with replaced audio saved as: {output_path}")
     except Exception as e:
         print(f"Error: {e}")
@@ -52,39 +108,53 @@ def combine_videos(video1_path, video2_path, output_path):
     if not os.path.isfile(video2_path):
         print(f"Second video file not found: {video2_path}")
         return
+    concat_list_path = None
     try:
-        clip1 = VideoFileClip(video1_path)
-        clip2 = VideoFileClip(video2_path)
-        final_clip = concatenate_videoclips([clip1, clip2])
-        final_clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
+        if probe_stream_params(video1_path) == probe_stream_params(video2_path):
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+                for path in (video1_path, video2_path):
+                    escaped = os.path.abspath(path).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+                concat_list_path = f.name
+            command = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path, "-c", "copy", output_path]
+        else:
+            print("Input videos have different stream parameters, re-encoding...")
+            input_args, with_audio = concat_filter_args([video1_path, video2_path])
+            audio_args = ["-c:a", "aac"] if with_audio else []
+            command = ["ffmpeg", "-y", *input_args, "-c:v", "libx264", *audio_args, output_path]
+        subprocess.run(command, check=True)
         print(f"Combined video saved as: {output_path}")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if concat_list_path:
+            os.remove(concat_list_path)
 
 
 def transcribe_audio(input_path, model_name="base"):
-    import whisper
+    import ctranslate2
+    from faster_whisper import WhisperModel
     if not os.path.isfile(input_path):
         print(f"File not found: {input_path}")
         return
     try:
-        model = whisper.load_model(model_name)
+        use_cuda = ctranslate2.get_cuda_device_count() > 0
+        model = WhisperModel(model_name, device="cuda" if use_cuda else "cpu", compute_type="float16" if use_cuda else "int8")
         print(f"Transcribing {input_path} with Whisper model '{model_name}'...")
-        result = model.transcribe(input_path, task="transcribe", verbose=True)
+        segments, _ = model.transcribe(input_path, task="transcribe", beam_size=5, vad_filter=True, vad_parameters=dict(min_silence_duration_ms=500))
         transcript_path = os.path.splitext(os.path.basename(input_path))[0] + ".txt"
         srt_path = os.path.splitext(os.path.basename(input_path))[0] + ".srt"
-        with open(transcript_path, "w") as f:
-            f.write(result["text"])
-        # Save SRT
-        with open(srt_path, "w") as f:
-            for segment in result["segments"]:
+        # Write TXT and SRT as segments are decoded instead of collecting them first
+        with open(transcript_path, "w") as txt_file, open(srt_path, "w") as srt_file:
+            for segment in segments:
+                txt_file.write(segment.text)
                 # SRT index
-                f.write(f"{segment['id']+1}\n")
+                srt_file.write(f"{segment.id}\n")
                 # SRT time format
-                start = segment['start']
-                end = segment['end']
-                f.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")
-                f.write(segment['text'].strip() + "\n\n")
+                start = segment.start
+                end = segment.end
+                srt_file.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")
+                srt_file.write(segment.text.strip() + "\n\n")
         print(f"Transcript saved as: {transcript_path}")
         print(f"SRT saved as: {srt_path}")
     except Exception as e:
@@ -92,11 +162,11 @@ def transcribe_audio(input_path, model_name="base"):
 
 
 def format_srt_time(seconds):
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = int(seconds % 60)
-    ms = int((seconds - int(seconds)) * 1000)
-    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+    ms = int(seconds * 1000)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
 
 def main():
@@ -1,11 +1,22 @@
 import sys
 import os
 import argparse
+import subprocess
+import tempfile
+import json
+import gc
+import functools
+import hashlib
+import queue
+import threading
+from pathlib import Path
+import asyncio
 from dotenv import load_dotenv
 load_dotenv()
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
 import openai
+import httpx
 import re
+from srt_utils import format_srt_time, srt_to_plain_text
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
@@ -18,9 +29,55 @@ SRT_DIR = "transcripts/srt"
 TXT_DIR = "transcripts/txt"
 DIFFS_DIR = "transcripts/diffs"
 
-# Ensure directories exist
-for d in [RAW_VIDEO_DIR, ENHANCED_AUDIO_DIR, PROCESSED_VIDEO_DIR, MP3_DIR, SRT_DIR, TXT_DIR, DIFFS_DIR]:
-    os.makedirs(d, exist_ok=True)
+
+def output_dir(d):
+    """Return an output directory as a Path, creating it if it does not exist."""
+    path = Path(d)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# Video encoders for when stream copy is impossible, in order of preference.
+# Hardware encoders are only used if the local ffmpeg build lists them.
+HW_VIDEO_ENCODERS = ["h264_nvenc", "h264_qsv", "h264_videotoolbox"]
+VIDEO_ENCODER_ARGS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "veryfast", "-global_quality", "23"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "65"],
+    "libx264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"],
+}
+
+# ffmpeg stderr messages meaning a stream-copied codec is not allowed in the output container
+CONTAINER_CODEC_ERRORS = (
+    "not currently supported in container",
+    "Could not find tag for codec",
+    "codec not currently supported",
+)
+
+# OpenAI model used for SRT cleaning, and where its responses are cached by content hash
+OPENAI_CLEAN_MODEL = "gpt-4.1-mini"
+CLEAN_SRT_CACHE_DIR = Path(DIFFS_DIR) / ".cache"
+
+# SRT cleaning: cues per OpenAI request, concurrent requests, and retries on rate limits
+CLEAN_SRT_CHUNK_SIZE = 40
+CLEAN_SRT_MAX_CONCURRENCY = 8
+CLEAN_SRT_MAX_RETRIES = 5
+
+# Minimum silence (ms) for the VAD pre-filter to cut audio before Whisper decoding
+VAD_MIN_SILENCE_MS = 500
+
+# Directory runs (--transcribe-batch, --pipeline): file types picked up, and WhisperS2T settings
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".mov", ".webm"}
+MEDIA_EXTENSIONS = VIDEO_EXTENSIONS | {".mp3", ".wav", ".m4a", ".flac"}
+WHISPER_S2T_BATCH_SIZE = 16
+
+# Max items waiting between pipeline stages (--pipeline)
+PIPELINE_QUEUE_SIZE = 2
+
+# Flush transcript files every N segments while streaming
+SRT_FLUSH_INTERVAL = 20
+
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1F\x7F-\x9F]')
 
 DEFAULT_CLEAN_SRT_PROMPT = """
 Process video transcripts by removing filler words and correcting misinterpreted words related to AI agents, Make.com, n8n, langflow, vector embeddings, and GPT. Ensure the main content remains intact.
@@ -41,40 +98,192 @@ Process video transcripts by removing filler words and correcting misinterpreted
 """
 
 
+def has_audio_stream(input_path):
+    """Return True if ffprobe reports at least one audio stream in the file."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a",
+         "-show_entries", "stream=codec_type", "-of", "csv=p=0", input_path],
+        capture_output=True, text=True, check=True
+    )
+    return bool(result.stdout.strip())
+
+
+def has_video_stream(input_path):
+    """Return True if ffprobe reports at least one video stream in the file."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v",
+         "-show_entries", "stream=codec_type", "-of", "csv=p=0", input_path],
+        capture_output=True, text=True, check=True
+    )
+    return bool(result.stdout.strip())
+
+
+def probe_stream_params(input_path):
+    """Return the codec parameters that must match for a stream-copy concat."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error",
+         "-show_entries", "stream=codec_type,codec_name,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels",
+         "-of", "json", input_path],
+        capture_output=True, text=True, check=True
+    )
+    streams = json.loads(result.stdout).get("streams", [])
+    return [tuple(sorted(stream.items())) for stream in streams]
+
+
+def probe_video_format(input_path):
+    """Return (width, height, frame_rate) of the first video stream."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height,r_frame_rate", "-of", "json", input_path],
+        capture_output=True, text=True, check=True
+    )
+    stream = json.loads(result.stdout)["streams"][0]
+    return stream["width"], stream["height"], stream["r_frame_rate"]
+
+
+def concat_filter_args(video_paths):
+    """Build ffmpeg input/filter/map args that concatenate videos with differing streams.
+
+    Every input is scaled and padded to the first video's resolution and frame
+    rate, and audio is resampled to a common format, so the concat filter can
+    join them. Returns (args, with_audio); audio is dropped if any input has none.
+    """
+    width, height, frame_rate = probe_video_format(video_paths[0])
+    with_audio = all(has_audio_stream(path) for path in video_paths)
+    inputs, filters, labels = [], [], []
+    for i, path in enumerate(video_paths):
+        inputs += ["-i", path]
+        filters.append(
+            f"[{i}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={frame_rate},format=yuv420p[v{i}]"
+        )
+        labels.append(f"[v{i}]")
+        if with_audio:
+            filters.append(f"[{i}:a:0]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo[a{i}]")
+            labels.append(f"[a{i}]")
+    outputs = "[v][a]" if with_audio else "[v]"
+    filters.append(f"{''.join(labels)}concat=n={len(video_paths)}:v=1:a={int(with_audio)}{outputs}")
+    maps = ["-map", "[v]", "-map", "[a]"] if with_audio else ["-map", "[v]"]
+    return [*inputs, "-filter_complex", ";".join(filters), *maps], with_audio
+
+
+@functools.lru_cache(maxsize=1)
+def get_hw_video_encoder():
+    """Return the first hardware H.264 encoder this ffmpeg build offers, or None."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    available = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    for encoder in HW_VIDEO_ENCODERS:
+        if encoder in available:
+            return encoder
+    return None
+
+
+def encode_video(input_args, audio_args, output_path):
+    """Run ffmpeg re-encoding the video, preferring a hardware encoder over libx264."""
+    hw_encoder = get_hw_video_encoder()
+    encoders = [hw_encoder, "libx264"] if hw_encoder else ["libx264"]
+    for encoder in encoders:
+        try:
+            subprocess.run(
+                ["ffmpeg", "-y", *input_args, *VIDEO_ENCODER_ARGS[encoder], *audio_args, output_path],
+                check=True
+            )
+            return
+        except subprocess.CalledProcessError:
+            # The encoder can be compiled in without a usable device
+            if encoder == "libx264":
+                raise
+            print(f"Hardware encoder {encoder} failed, falling back to libx264...")
+
+
 def extract_mp3(input_path):
     """Extract MP3 audio from a video file."""
-    if not os.path.isfile(input_path):
+    input_path = Path(input_path)
+    if not input_path.is_file():
         print(f"File not found: {input_path}")
         return
-    filename, _ = os.path.splitext(os.path.basename(input_path))
-    output_path = os.path.join(MP3_DIR, f"{filename}.mp3")
+    output_path = output_dir(MP3_DIR) / f"{input_path.stem}.mp3"
     try:
-        with VideoFileClip(input_path) as video:
-            audio = video.audio
-            if audio is None:
-                print("No audio stream found in the video.")
-                return
-            audio.write_audiofile(output_path, codec='mp3')
+        if not has_audio_stream(input_path):
+            print("No audio stream found in the video.")
+            return
+        # Demux and encode the audio only; video frames are never decoded
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", input_path, "-vn", "-ac", "2", "-ar", "44100",
+             "-codec:a", "libmp3lame", "-q:a", "2", output_path],
+            check=True
+        )
         print(f"Extracted MP3 saved as: {output_path}")
+        return output_path
     except Exception as e:
         print(f"Error: {e}")
 
 
+def extract_audio_for_whisper(input_path, output_path=None):
+    """Extract 16 kHz mono PCM WAV for Whisper, which resamples to that anyway.
+
+    Skips the MP3 encode/decode round-trip. Without output_path the WAV is
+    written to a temporary file that the caller is responsible for removing.
+    """
+    input_path = Path(input_path)
+    is_temp = output_path is None
+    if is_temp:
+        fd, output_path = tempfile.mkstemp(prefix=f"{input_path.stem}_", suffix=".wav")
+        os.close(fd)
+    output_path = Path(output_path)
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-i", input_path, "-vn",
+             "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", output_path],
+            check=True
+        )
+    except BaseException:
+        # The caller never receives the path on failure, so clean up here
+        if is_temp:
+            output_path.unlink(missing_ok=True)
+        raise
+    return output_path
+
+
 def replace_audio(input_video_path, enhanced_wav_path):
     """Replace the audio in a video file with an enhanced WAV file."""
-    if not os.path.isfile(input_video_path):
+    input_video_path = Path(input_video_path)
+    enhanced_wav_path = Path(enhanced_wav_path)
+    if not input_video_path.is_file():
         print(f"Video file not found: {input_video_path}")
         return
-    if not os.path.isfile(enhanced_wav_path):
+    if not enhanced_wav_path.is_file():
         print(f"Enhanced WAV file not found: {enhanced_wav_path}")
         return
-    filename, ext = os.path.splitext(os.path.basename(input_video_path))
-    output_path = os.path.join(PROCESSED_VIDEO_DIR, f"{filename}_enhanced{ext}")
+    output_path = output_dir(PROCESSED_VIDEO_DIR) / f"{input_video_path.stem}_enhanced{input_video_path.suffix}"
     try:
-        with VideoFileClip(input_video_path) as video:
-            with AudioFileClip(enhanced_wav_path) as audio:
-                video = video.set_audio(audio)
-                video.write_videofile(output_path, codec='libx264', audio_codec='aac', audio_fps=44100, temp_audiofile='temp-audio.m4a', remove_temp=True)
+        # Check the inputs up front so bad inputs are not retried with re-encoding
+        if not has_video_stream(input_video_path):
+            print(f"No video stream found in: {input_video_path}")
+            return
+        if not has_audio_stream(enhanced_wav_path):
+            print(f"No audio stream found in: {enhanced_wav_path}")
+            return
+        # Stream-copy the video track and re-encode only the new audio.
+        # The WAV should match the video length; -shortest trims any overhang.
+        input_args = ["-i", input_video_path, "-i", enhanced_wav_path, "-map", "0:v:0", "-map", "1:a:0"]
+        audio_args = ["-c:a", "aac", "-b:a", "192k", "-shortest"]
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-hide_banner", *input_args, "-c:v", "copy", *audio_args, output_path],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            if not any(message in result.stderr for message in CONTAINER_CODEC_ERRORS):
+                print(result.stderr)
+                result.check_returncode()
+            print("Could not copy the video stream into the output container, re-encoding...")
+            encode_video(input_args, audio_args, output_path)
         print(f"Video with replaced audio saved as: {output_path}")
     except Exception as e:
         print(f"Error: {e}")
@@ -82,107 +291,338 @@ def replace_audio(input_video_path, enhanced_wav_path):
 
 def combine_videos(video1_path, video2_path, output_path=None):
     """Combine two video files into one."""
-    if not os.path.isfile(video1_path):
+    video1_path = Path(video1_path)
+    video2_path = Path(video2_path)
+    if not video1_path.is_file():
         print(f"First video file not found: {video1_path}")
         return
-    if not os.path.isfile(video2_path):
+    if not video2_path.is_file():
         print(f"Second video file not found: {video2_path}")
         return
-    if output_path is None:
-        output_path = os.path.join(PROCESSED_VIDEO_DIR, "combined.mp4")
-    else:
-        output_path = os.path.join(PROCESSED_VIDEO_DIR, os.path.basename(output_path))
+    output_name = "combined.mp4" if output_path is None else Path(output_path).name
+    output_path = output_dir(PROCESSED_VIDEO_DIR) / output_name
+    concat_list_path = None
     try:
-        clip1 = VideoFileClip(video1_path)
-        clip2 = VideoFileClip(video2_path)
-        final_clip = concatenate_videoclips([clip1, clip2])
-        final_clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
+        if probe_stream_params(video1_path) == probe_stream_params(video2_path):
+            # Same codecs/resolution/timebase: the concat demuxer can remux
+            # byte-for-byte. Its list file escapes single quotes per ffmpeg's syntax
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+                for path in (video1_path, video2_path):
+                    escaped = str(path.resolve()).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+                concat_list_path = f.name
+            subprocess.run(
+                ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list_path, "-c", "copy", output_path],
+                check=True
+            )
+        else:
+            # The demuxer assumes identical streams, so decode each input
+            # separately and join them with the concat filter instead
+            print("Input videos have different stream parameters, re-encoding...")
+            input_args, with_audio = concat_filter_args([video1_path, video2_path])
+            encode_video(input_args, ["-c:a", "aac"] if with_audio else [], output_path)
         print(f"Combined video saved as: {output_path}")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if concat_list_path:
+            os.remove(concat_list_path)
+
+
+class WhisperManager:
+    """Process-wide cache of the loaded Whisper model, reloaded only when the config changes."""
+    _model = None
+    _model_size = None
+    _device = None
+
+    @classmethod
+    def get_model(cls, device, model_size):
+        if cls._model is None or cls._model_size != model_size or cls._device != device:
+            from faster_whisper import WhisperModel
+            cls.unload()
+            print(f"Loading Whisper model '{model_size}' on {device}...")
+            options = dict(
+                device=device,
+                compute_type="int8_float16" if device == "cuda" else "int8",
+                cpu_threads=os.cpu_count() or 0
+            )
+            if device == "cuda":
+                try:
+                    cls._model = WhisperModel(model_size, flash_attention=True, **options)
+                except (TypeError, RuntimeError, ValueError) as e:
+                    # FlashAttention needs CTranslate2 4.3+ and a recent GPU (compute capability 8.0+)
+                    print(f"FlashAttention unavailable ({e}), loading without it...")
+                    cls._model = WhisperModel(model_size, **options)
+            else:
+                cls._model = WhisperModel(model_size, **options)
+            cls._model_size = model_size
+            cls._device = device
+        return cls._model
+
+    @classmethod
+    def unload(cls):
+        cls._model = None
+        cls._model_size = None
+        cls._device = None
+        gc.collect()
+
+
+def get_whisper_device():
+    """Return "cuda" if a CUDA device is visible to CTranslate2, else "cpu"."""
+    import ctranslate2
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+
+def write_transcript(segments, transcript_path, srt_path):
+    """Write (start, end, text) segments to the plain text transcript and SRT files."""
+    # Segments may be yielded lazily; write each one as it arrives so memory
+    # stays flat and an interrupted run leaves a usable partial transcript
+    with open(transcript_path, "w", encoding='utf-8') as txt_file, \
+            open(srt_path, "w", encoding='utf-8', newline='') as srt_file:
+        for i, (start, end, raw_text) in enumerate(segments, start=1):
+            txt_file.write(raw_text)
+            
+            start = max(0, float(start))
+            end = max(start + 0.001, float(end))
+            
+            # Clean up the text and remove any problematic characters
+            text = _CONTROL_CHARS_RE.sub('', raw_text.strip())
+            if not text:
+                continue
+            
+            # Index, timestamp, then text with exactly one blank line after
+            timing = f"{format_srt_time(start)} --> {format_srt_time(end)}"
+            srt_file.write(f"{i}\n{timing}\n{text}\n\n")
+            print(f"[{timing}] {text}")
+            if i % SRT_FLUSH_INTERVAL == 0:
+                txt_file.flush()
+                srt_file.flush()
+
 
+def transcribe_audio(input_path, model_name="base", audio_path=None, language=None):
+    """Transcribe audio or video file to text and SRT using faster-whisper.
 
-def format_srt_time(seconds):
-    """Format time in SRT format: HH:MM:SS,mmm"""
-    if seconds < 0:
-        seconds = 0
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = int(seconds % 60)
-    # Ensure milliseconds are properly handled and never zero
-    ms = int(round((seconds - int(seconds)) * 1000))
-    if ms == 0:  # If milliseconds are zero, set to a small non-zero value
-        ms = 640 if s == 0 else 1  # Use 640 for start of segments, 1 otherwise
-    elif ms >= 1000:  # Handle edge case
-        ms = 999
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
-
-
-def transcribe_audio(input_path, model_name="base"):
-    """Transcribe audio or video file to text and SRT using Whisper."""
-    import whisper
-    if not os.path.isfile(input_path):
+    Video inputs are first reduced to a temporary 16 kHz mono WAV. Pass
+    audio_path to decode an already extracted file instead; output names
+    still follow input_path. language (e.g. "en") skips auto-detection.
+    """
+    input_path = Path(input_path)
+    if not input_path.is_file():
         print(f"File not found: {input_path}")
         return
-    filename, _ = os.path.splitext(os.path.basename(input_path))
-    transcript_path = os.path.join(TXT_DIR, f"{filename}.txt")
-    srt_path = os.path.join(SRT_DIR, f"{filename}.srt")
+    transcript_path = output_dir(TXT_DIR) / f"{input_path.stem}.txt"
+    srt_path = output_dir(SRT_DIR) / f"{input_path.stem}.srt"
+    temp_audio_path = None
     try:
-        model = whisper.load_model(model_name)
+        if audio_path is None and input_path.suffix.lower() in VIDEO_EXTENSIONS:
+            audio_path = temp_audio_path = extract_audio_for_whisper(input_path)
+        model = WhisperManager.get_model(get_whisper_device(), model_name)
         print(f"Transcribing {input_path} with Whisper model '{model_name}'...")
         
-        result = model.transcribe(
-            input_path,
+        segments, _ = model.transcribe(
+            str(audio_path or input_path),
             task="transcribe",
-            verbose=True,
+            language=language,
+            beam_size=5,
+            # Silero VAD drops silence/music before decoding; timestamps are
+            # mapped back to the original audio by faster-whisper
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=VAD_MIN_SILENCE_MS),
             condition_on_previous_text=True
         )
         
-        # Save plain text transcript
-        with open(transcript_path, "w", encoding='utf-8') as f:
-            f.write(result["text"])
-            
-        # Save SRT with exact format matching working example
-        with open(srt_path, "w", encoding='utf-8', newline='') as f:
-            for i, segment in enumerate(result["segments"], start=1):
-                start = max(0, float(segment['start']))
-                end = max(start + 0.001, float(segment['end']))
-                
-                # Clean up the text and remove any problematic characters
-                text = segment['text'].strip()
-                text = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', text)  # Remove control characters
-                if not text:
-                    continue
-                
-                # Write SRT entry with exact format (no extra spaces or newlines)
-                f.write(f"{i}\n")  # Index
-                f.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")  # Timestamp
-                f.write(f"{text}\n\n")  # Text with exactly one blank line after
-                
+        write_transcript(
+            ((segment.start, segment.end, segment.text) for segment in segments),
+            transcript_path,
+            srt_path
+        )
+        
         print(f"Transcript saved as: {transcript_path}")
         print(f"SRT saved as: {srt_path}")
         return transcript_path, srt_path
     except Exception as e:
         print(f"Error during transcription: {e}")
         raise
+    finally:
+        if temp_audio_path is not None:
+            temp_audio_path.unlink(missing_ok=True)
+
+
+def transcribe_batch(paths, model_name="base", language=None):
+    """Transcribe several files in one process, loading the Whisper model only once.
+
+    A file that fails is reported and skipped (its result is None) so the
+    rest of the batch still runs.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append(transcribe_audio(path, model_name, language=language))
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            results.append(None)
+    return results
+
+
+def split_srt_blocks(srt_content):
+    """Split SRT content into cue blocks on blank-line boundaries."""
+    return [block.strip() for block in re.split(r"\n\s*\n", srt_content) if block.strip()]
+
+
+def extract_srt_cues(content):
+    """Return the cues in a model reply as blocks starting at their timing line.
+
+    Code fences and any block without a "-->" timing line (preambles,
+    commentary, paragraphs) are dropped, as are the original index lines.
+    """
+    lines = [line for line in content.splitlines() if not line.strip().startswith("```")]
+    cues = []
+    for block in split_srt_blocks("\n".join(lines)):
+        block_lines = block.splitlines()
+        for i, line in enumerate(block_lines):
+            if "-->" in line:
+                cues.append("\n".join(block_lines[i:]))
+                break
+    return cues
+
+
+def renumber_srt_blocks(cues):
+    """Join cues (timing line first) into SRT content with indices running from 1."""
+    renumbered = [f"{i}\n{cue}" for i, cue in enumerate(cues, start=1)]
+    return "\n\n".join(renumbered) + "\n" if renumbered else ""
+
 
+async def _clean_srt_chunk(client, semaphore, prompt, chunk, force=False):
+    """Clean one chunk of SRT content, backing off exponentially on rate limits.
 
-def clean_srt_with_openai(srt_path, output_srt_path, prompt=None):
-    """Send SRT to OpenAI API for cleaning and correction."""
+    Responses are cached on disk keyed by the prompt, chunk and model, so
+    re-running on unchanged input skips the API call unless force is set.
+    """
+    key = hashlib.sha256((prompt + chunk + OPENAI_CLEAN_MODEL).encode("utf-8")).hexdigest()
+    cache_path = CLEAN_SRT_CACHE_DIR / f"{key}.srt"
+    if not force and cache_path.is_file():
+        return cache_path.read_text(encoding="utf-8")
+    for attempt in range(CLEAN_SRT_MAX_RETRIES):
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=OPENAI_CLEAN_MODEL,
+                    messages=[
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": chunk}
+                    ],
+                    temperature=0.2
+                )
+            cleaned = response.choices[0].message.content
+            if not cleaned or not extract_srt_cues(cleaned):
+                # Don't cache or emit a reply that isn't SRT; keep the cues uncleaned
+                print("Warning: OpenAI returned no SRT cues for a chunk, keeping it uncleaned.")
+                return chunk
+            output_dir(CLEAN_SRT_CACHE_DIR)
+            cache_path.write_text(cleaned, encoding="utf-8")
+            return cleaned
+        except openai.RateLimitError:
+            if attempt == CLEAN_SRT_MAX_RETRIES - 1:
+                raise
+            delay = 2 ** attempt
+            print(f"Rate limited by OpenAI, retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+
+def list_media_files(input_dir):
+    """Return the sorted audio/video files directly inside a directory."""
+    return sorted(
+        path for path in Path(input_dir).iterdir()
+        if path.is_file() and path.suffix.lower() in MEDIA_EXTENSIONS
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _load_s2t_model(model_name):
+    import whisper_s2t
+    print(f"Loading WhisperS2T model '{model_name}'...")
+    return whisper_s2t.load_model(
+        model_identifier=model_name,
+        backend="CTranslate2",
+        compute_type="int8_float16"
+    )
+
+
+def transcribe_directory(input_dir, model_name="base", language=None):
+    """Transcribe every audio/video file in a directory.
+
+    On CUDA with WhisperS2T installed and a language given, all files are
+    decoded together in batches. WhisperS2T needs a fixed language, so
+    without one (or without CUDA/WhisperS2T) each file goes through
+    transcribe_audio with the cached faster-whisper model, which
+    auto-detects the language per file.
+    """
+    if not Path(input_dir).is_dir():
+        print(f"Directory not found: {input_dir}")
+        return
+    paths = list_media_files(input_dir)
+    if not paths:
+        print(f"No audio/video files found in: {input_dir}")
+        return []
+    try:
+        import whisper_s2t  # noqa: F401
+        use_s2t = language is not None and get_whisper_device() == "cuda"
+    except ImportError:
+        use_s2t = False
+    if not use_s2t:
+        return transcribe_batch(paths, model_name, language)
+
+    model = _load_s2t_model(model_name)
+    print(f"Batch transcribing {len(paths)} files with WhisperS2T model '{model_name}'...")
+    outputs = model.transcribe_with_vad(
+        [str(path) for path in paths],
+        lang_codes=[language] * len(paths),
+        tasks=["transcribe"] * len(paths),
+        initial_prompts=[None] * len(paths),
+        batch_size=WHISPER_S2T_BATCH_SIZE
+    )
+    results = []
+    for path, segments in zip(paths, outputs):
+        transcript_path = output_dir(TXT_DIR) / f"{path.stem}.txt"
+        srt_path = output_dir(SRT_DIR) / f"{path.stem}.srt"
+        write_transcript(
+            ((seg["start_time"], seg["end_time"], f" {seg['text'].strip()}") for seg in segments),
+            transcript_path,
+            srt_path
+        )
+        print(f"Transcript saved as: {transcript_path}")
+        print(f"SRT saved as: {srt_path}")
+        results.append((transcript_path, srt_path))
+    return results
+
+
+async def _clean_srt_chunks(chunks, prompt, force=False):
+    """Clean all chunks concurrently over one HTTP/2 connection, returning them in order."""
+    semaphore = asyncio.Semaphore(CLEAN_SRT_MAX_CONCURRENCY)
+    async with httpx.AsyncClient(http2=True, timeout=httpx.Timeout(600.0, connect=10.0)) as http_client:
+        client = openai.AsyncOpenAI(api_key=openai_api_key, http_client=http_client)
+        return await asyncio.gather(
+            *(_clean_srt_chunk(client, semaphore, prompt, chunk, force) for chunk in chunks)
+        )
+
+
+def clean_srt_with_openai(srt_path, output_srt_path, prompt=None, force=False):
+    """Send SRT to OpenAI API for cleaning and correction, in concurrent chunks."""
     if prompt is None:
         prompt = DEFAULT_CLEAN_SRT_PROMPT
     with open(srt_path, "r") as f:
         srt_content = f.read()
-    client = openai.OpenAI(api_key=openai_api_key)
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": srt_content}
-        ],
-        temperature=0.2
-    )
-    cleaned_srt = response.choices[0].message.content
+    blocks = split_srt_blocks(srt_content)
+    chunks = [
+        "\n\n".join(blocks[i:i + CLEAN_SRT_CHUNK_SIZE])
+        for i in range(0, len(blocks), CLEAN_SRT_CHUNK_SIZE)
+    ]
+    cleaned_chunks = asyncio.run(_clean_srt_chunks(chunks, prompt, force))
+    cleaned_cues = []
+    for cleaned_chunk in cleaned_chunks:
+        cleaned_cues.extend(extract_srt_cues(cleaned_chunk))
+    cleaned_srt = renumber_srt_blocks(cleaned_cues)
+    output_dir(Path(output_srt_path).parent)
     with open(output_srt_path, "w") as f:
         f.write(cleaned_srt)
     print(f"Cleaned SRT saved as: {output_srt_path}")
@@ -193,38 +633,145 @@ def srt_to_text(srt_path, output_txt_path):
     """Convert SRT file to clean text by removing timings and indices."""
     with open(srt_path, "r") as f:
         srt_content = f.read()
-    # Remove SRT index and timings
-    text = re.sub(r"\d+\n\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\n", "", srt_content)
-    # Remove empty lines
-    text = re.sub(r"\n{2,}", "\n", text)
+    text = srt_to_plain_text(srt_content)
+    output_dir(Path(output_txt_path).parent)
     with open(output_txt_path, "w") as f:
-        f.write(text.strip())
+        f.write(text)
     print(f"Text transcript saved as: {output_txt_path}")
     return output_txt_path
 
 
+def _pipeline_worker(stage, in_queue, out_queue, stop):
+    """Apply a pipeline stage to each item from in_queue until a None sentinel arrives or stop is set."""
+    while not stop.is_set():
+        item = in_queue.get()
+        if item is None:
+            if out_queue is not None:
+                out_queue.put(None)
+            break
+        if stop.is_set():
+            break
+        try:
+            result = stage(item)
+        except Exception as e:
+            print(f"Pipeline error on {item}: {e}")
+            result = None
+        if result is not None and out_queue is not None:
+            out_queue.put(result)
+
+
+def pipeline_dir(input_dir, model_name="base", prompt=None, force=False, language=None):
+    """Run extract -> transcribe -> clean -> text over a directory, overlapping stages across files.
+
+    Each stage runs in its own thread (ffmpeg, Whisper and the OpenAI API use
+    different resources), connected by bounded queues.
+    """
+    if not Path(input_dir).is_dir():
+        print(f"Directory not found: {input_dir}")
+        return
+    paths = list_media_files(input_dir)
+    if not paths:
+        print(f"No audio/video files found in: {input_dir}")
+        return
+
+    # Temp WAVs extracted but not yet transcribed, removed if the run is interrupted
+    pending_wavs = set()
+    stop = threading.Event()
+
+    def extract(path):
+        # Extract Whisper-ready WAV here so ffmpeg overlaps with transcription
+        path = Path(path)
+        if path.suffix.lower() in VIDEO_EXTENSIONS:
+            wav_path = extract_audio_for_whisper(path)
+            pending_wavs.add(wav_path)
+            return path, wav_path
+        return path, None
+
+    def transcribe(item):
+        path, wav_path = item
+        try:
+            result = transcribe_audio(path, model_name, audio_path=wav_path, language=language)
+        finally:
+            if wav_path is not None:
+                wav_path.unlink(missing_ok=True)
+                pending_wavs.discard(wav_path)
+        if result is None:
+            print(f"Skipping {path}: transcription produced no output")
+            return None
+        _, srt_path = result
+        return srt_path
+
+    def clean(srt_path):
+        return clean_srt_with_openai(srt_path, output_dir(SRT_DIR) / f"{Path(srt_path).stem}_cleaned.srt", prompt, force)
+
+    def to_text(cleaned_srt_path):
+        return srt_to_text(cleaned_srt_path, output_dir(TXT_DIR) / f"{Path(cleaned_srt_path).stem}.md")
+
+    stages = [
+        ("extract_worker", extract),
+        ("transcribe_worker", transcribe),
+        ("clean_worker", clean),
+        ("text_worker", to_text),
+    ]
+    queues = [queue.Queue(maxsize=PIPELINE_QUEUE_SIZE) for _ in stages]
+    workers = []
+    for i, (name, stage) in enumerate(stages):
+        out_queue = queues[i + 1] if i + 1 < len(queues) else None
+        # Daemon threads so an interrupted run can exit while a stage is blocked
+        worker = threading.Thread(
+            target=_pipeline_worker, args=(stage, queues[i], out_queue, stop), name=name, daemon=True
+        )
+        worker.start()
+        workers.append(worker)
+    try:
+        for path in paths:
+            queues[0].put(path)
+        queues[0].put(None)
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop.set()
+        print("Pipeline interrupted, stopping workers...")
+        for wav_path in list(pending_wavs):
+            wav_path.unlink(missing_ok=True)
+        raise
+    print(f"Pipeline finished for {len(paths)} files in: {input_dir}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Lesson Processing Pipeline: Extract MP3, replace audio, combine videos, transcribe, clean SRT, and convert to text.")
     parser.add_argument("input_file", nargs="?", help="Input video/audio file (MKV/MP4/MP3/WAV)")
     parser.add_argument("--replace-audio", help="Enhanced WAV file to replace the original audio")
     parser.add_argument("--combine", nargs=3, metavar=("VIDEO1", "VIDEO2", "OUTPUT"), help="Combine two videos into one output file")
     parser.add_argument("--transcribe", action="store_true", help="Transcribe the input file using Whisper")
+    parser.add_argument("--transcribe-batch", metavar="DIR", help="Transcribe every audio/video file in a directory")
+    parser.add_argument("--pipeline", metavar="DIR", help="Extract, transcribe, clean and convert every file in a directory")
     parser.add_argument("--model", default="base", help="Whisper model to use (default: base)")
+    parser.add_argument("--language", default=None, help="Spoken language code, e.g. en (default: auto-detect per file)")
     parser.add_argument("--clean-srt", nargs=2, metavar=("SRT", "OUTPUT_SRT"), help="Clean SRT file with OpenAI API and save to output SRT")
     parser.add_argument("--prompt", default=None, help="Prompt file or string for OpenAI cleaning")
+    parser.add_argument("--force", action="store_true", help="Ignore cached OpenAI cleaning results and call the API again")
     parser.add_argument("--srt-to-text", nargs=2, metavar=("SRT", "OUTPUT_TXT"), help="Convert SRT file to clean text")
     args = parser.parse_args()
 
+    # Input folders users drop files into; output folders are created as they are written
+    for d in (RAW_VIDEO_DIR, ENHANCED_AUDIO_DIR):
+        Path(d).mkdir(parents=True, exist_ok=True)
+
     if args.combine:
         video1, video2, output = args.combine
         combine_videos(video1, video2, output)
     elif args.replace_audio:
         replace_audio(args.input_file, args.replace_audio)
     elif args.transcribe:
-        transcribe_audio(args.input_file, args.model)
+        transcribe_audio(args.input_file, args.model, language=args.language)
+    elif args.pipeline:
+        pipeline_dir(args.pipeline, args.model, args.prompt, args.force, args.language)
+    elif args.transcribe_batch:
+        transcribe_directory(args.transcribe_batch, args.model, args.language)
     elif args.clean_srt:
         srt_path, output_srt_path = args.clean_srt
-        clean_srt_with_openai(srt_path, output_srt_path, args.prompt)
+        clean_srt_with_openai(srt_path, output_srt_path, args.prompt, args.force)
     elif args.srt_to_text:
         srt_path, output_txt_path = args.srt_to_text
         srt_to_text(srt_path, output_txt_path)
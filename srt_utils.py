@@ -0,0 +1,37 @@
+"""Hot SRT helpers, kept type-annotated so they can be compiled with mypyc.
+
+Running `mypyc srt_utils.py` builds a native extension next to this file,
+which Python then imports in preference to the source.
+"""
+import re
+
+# Matches an SRT cue header (index line + timing line)
+_SRT_BLOCK_RE = re.compile(
+    r"^\d+\s*\n\d{2}:\d{2}:\d{2},\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}\s*\n",
+    re.MULTILINE
+)
+
+
+def format_srt_time(seconds: float) -> str:
+    """Format time in SRT format: HH:MM:SS,mmm"""
+    if seconds < 0:
+        seconds = 0.0
+    whole: int = int(seconds)
+    m, s = divmod(whole, 60)
+    h, m = divmod(m, 60)
+    # Ensure milliseconds are properly handled and never zero
+    ms: int = int(round((seconds - whole) * 1000))
+    if ms == 0:  # If milliseconds are zero, set to a small non-zero value
+        ms = 640 if s == 0 else 1  # Use 640 for start of segments, 1 otherwise
+    elif ms >= 1000:  # Handle edge case
+        ms = 999
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def srt_to_plain_text(srt_content: str) -> str:
+    """Strip SRT indices, timings and blank lines, leaving one text line per line."""
+    # Remove SRT index and timings
+    text = _SRT_BLOCK_RE.sub("", srt_content)
+    # Remove empty lines
+    lines = [line.strip() for line in text.splitlines()]
+    return "\n".join([line for line in lines if line])